@@ -1 +1 @@
-__version__ = "0.4.2"
+__version__ = "0.8.0"
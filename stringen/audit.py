@@ -0,0 +1,376 @@
+"""Entropy auditing of many input files and streams at once."""
+
+from __future__ import annotations
+
+import glob
+import itertools
+import os
+import queue
+import sys
+import threading
+from collections import deque
+from dataclasses import dataclass
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from typing import BinaryIO, Iterable, Iterator, NamedTuple
+
+from .utils import (
+    character_set_size,
+    password_entropy,
+    recognized_base,
+    shannon_entropy,
+)
+
+STDIN = "-"
+CHUNK_SIZE = 1 << 20
+BATCH_SIZE = 10_000
+
+
+class LineResult(NamedTuple):
+    """Entropy statistics of a single line."""
+
+    number: int
+    text: str
+    length: int
+    shannon: float
+    password: float
+    base: int
+    charset_size: int
+
+
+class FileResult(NamedTuple):
+    """Analysis of one file: line statistics, illegal lines or a read error."""
+
+    path: str
+    lines: list[LineResult]
+    illegal: list[int]
+    error: str | None = None
+
+
+@dataclass
+class AuditTotals:
+    """Problems found during an audit, used to decide the exit status."""
+
+    errors: int = 0
+    illegal: int = 0
+
+    def add(self, result: FileResult) -> None:
+        """Count the read error and illegal lines of ``result``."""
+        if result.error is not None:
+            self.errors += 1
+        self.illegal += len(result.illegal)
+
+
+def expand_paths(patterns: Iterable[str]) -> list[Path]:
+    """Return the files matched by ``patterns``.
+
+    Each pattern may name a file, a directory (searched recursively), a glob
+    pattern (``**`` is supported) or ``-`` for standard input. Raises
+    ``FileNotFoundError`` when a pattern matches nothing.
+    """
+    paths: list[Path] = []
+    for pattern in patterns:
+        if pattern == STDIN:
+            paths.append(Path(STDIN))
+            continue
+        if any(ch in pattern for ch in "*?["):
+            matches = sorted(glob.glob(pattern, recursive=True))
+        else:
+            matches = [pattern] if os.path.exists(pattern) else []
+        if not matches:
+            raise FileNotFoundError(f"No such file or directory: '{pattern}'")
+        for match in matches:
+            path = Path(match)
+            if path.is_dir():
+                paths.extend(sorted(p for p in path.rglob("*") if p.is_file()))
+            else:
+                paths.append(path)
+    return list(dict.fromkeys(paths))
+
+
+def read_lines(path: str | Path) -> list[str]:
+    """Return the lines of ``path`` without trailing newlines."""
+    with open(path, "r", encoding="utf-8") as fh:
+        return [line.rstrip("\n") for line in fh]
+
+
+def _read_file(path: Path) -> tuple[list[str], str | None]:
+    """Return the lines of ``path`` or the error raised while reading it."""
+    try:
+        return read_lines(path), None
+    except (OSError, UnicodeDecodeError) as exc:
+        return [], str(exc)
+
+
+def iter_stream_lines(
+    chunks: Iterable[bytes], encoding: str = "utf-8"
+) -> Iterator[str]:
+    """Yield the lines contained in ``chunks`` without trailing newlines.
+
+    Lines may span chunk boundaries; the unterminated rest of one chunk is
+    carried over to the next. ``\\r\\n`` line endings are accepted like in file
+    mode. Undecodable bytes are kept as surrogates, so the line is reported as
+    illegal instead of aborting the stream.
+    """
+    remainder = b""
+    for chunk in chunks:
+        parts = (remainder + chunk).split(b"\n")
+        remainder = parts.pop()
+        for part in parts:
+            yield _decode_line(part, encoding)
+    if remainder:
+        yield _decode_line(remainder, encoding)
+
+
+def _decode_line(line: bytes, encoding: str) -> str:
+    """Return ``line`` decoded without a trailing carriage return."""
+    if line.endswith(b"\r"):
+        line = line[:-1]
+    return line.decode(encoding, errors="surrogateescape")
+
+
+def _pump(stream: BinaryIO, chunks: queue.Queue, chunk_size: int) -> None:
+    """Read ``stream`` into ``chunks`` until EOF, ending with ``None``."""
+    try:
+        while chunk := stream.read(chunk_size):
+            chunks.put(chunk)
+    except BaseException as exc:  # handed to the consuming thread
+        chunks.put(exc)
+    else:
+        chunks.put(None)
+
+
+def read_chunks(stream: BinaryIO, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """Yield chunks of ``stream`` read ahead by a background thread.
+
+    Reading continues while the caller processes earlier chunks, so a
+    producer feeding a pipe is not stalled by the analysis.
+    """
+    chunks: queue.Queue = queue.Queue(maxsize=16)
+    threading.Thread(
+        target=_pump, args=(stream, chunks, chunk_size), daemon=True
+    ).start()
+    while (chunk := chunks.get()) is not None:
+        if isinstance(chunk, BaseException):
+            raise chunk
+        yield chunk
+
+
+def analyze_lines(path: str, lines: list[str], start: int = 1) -> FileResult:
+    """Return the entropy statistics for the non-empty ``lines`` of ``path``.
+
+    Line numbers refer to the position in the file, the first of ``lines``
+    being line ``start``. Lines with non-printable characters are reported as
+    illegal instead of being analysed.
+    """
+    results: list[LineResult] = []
+    illegal: list[int] = []
+    for number, line in enumerate(lines, start=start):
+        if line == "":
+            continue
+        if not line.isprintable():
+            illegal.append(number)
+            continue
+        results.append(
+            LineResult(
+                number,
+                line,
+                len(line),
+                shannon_entropy(line),
+                password_entropy(line),
+                recognized_base(line),
+                character_set_size(line),
+            )
+        )
+    return FileResult(path, results, illegal)
+
+
+def _format_lines(result: FileResult, clean: bool) -> list[str]:
+    """Return the per-line output of ``result`` tagged with file and line."""
+    output: list[str] = []
+    for line in result.lines:
+        tag = f"{result.path}:{line.number}"
+        if not clean:
+            output.append(f"{tag}: string: {line.text}")
+        output.append(
+            f"{tag}: Length: {line.length}, "
+            f"Shannon entropy: {line.shannon:.2f} bits/char "
+            f"({line.shannon * line.length:.2f} bits total), "
+            f"Password entropy: {line.password:.2f} bits, "
+            f"Recognized base: {line.base} (Character Set: {line.charset_size})"
+        )
+    for number in result.illegal:
+        output.append(f"{result.path}:{number}: illegal characters")
+    return output
+
+
+def _format_summary(
+    path: str, entropies: list[float], illegal: int
+) -> str:
+    """Return the summary line for a file with the given password entropies."""
+    summary = f"{path}: Lines: {len(entropies)}"
+    if entropies:
+        summary += (
+            f", password entropy min {min(entropies):.2f}"
+            f" / avg {sum(entropies) / len(entropies):.2f}"
+            f" / max {max(entropies):.2f} bits"
+        )
+    if illegal:
+        summary += f", illegal lines: {illegal}"
+    return summary
+
+
+def format_file_result(result: FileResult, *, clean: bool = False) -> list[str]:
+    """Return output lines tagged with file and line number plus a summary."""
+    if result.error is not None:
+        return [f"{result.path}: error: {result.error}"]
+    output = _format_lines(result, clean)
+    output.append(
+        _format_summary(
+            result.path,
+            [line.password for line in result.lines],
+            len(result.illegal),
+        )
+    )
+    return output
+
+
+def _start_workers(workers: ProcessPoolExecutor) -> None:
+    """Launch the worker processes before any reader thread is running.
+
+    Workers may be forked; forking while a reader thread holds a lock, such
+    as the one of ``sys.stdin``, can deadlock the child.
+    """
+    workers.submit(int).result()
+
+
+def _is_stream(path: Path) -> bool:
+    """Return whether ``path`` is standard input or a non-seekable pipe."""
+    return str(path) == STDIN or path.is_fifo() or path.is_char_device()
+
+
+def audit_stream(
+    stream: BinaryIO,
+    name: str,
+    *,
+    clean: bool = False,
+    chunk_size: int = CHUNK_SIZE,
+    batch_size: int = BATCH_SIZE,
+    totals: AuditTotals | None = None,
+) -> Iterator[str]:
+    """Yield the formatted audit of the lines read from ``stream``.
+
+    The stream is read in large chunks by a background thread and batches of
+    lines are analysed in a process pool, so reading, analysis and whatever
+    produces the stream all run concurrently. Illegal lines are counted in
+    ``totals`` when given.
+    """
+    window = 2 * (os.cpu_count() or 1)
+    entropies: list[float] = []
+    illegal = 0
+    with ProcessPoolExecutor() as workers:
+        _start_workers(workers)
+        lines = iter_stream_lines(read_chunks(stream, chunk_size))
+        pending: deque[Future[FileResult]] = deque()
+        start = 1
+        while batch := list(itertools.islice(lines, batch_size)):
+            pending.append(workers.submit(analyze_lines, name, batch, start))
+            start += len(batch)
+            while pending and (len(pending) > window or pending[0].done()):
+                result = pending.popleft().result()
+                entropies.extend(line.password for line in result.lines)
+                illegal += len(result.illegal)
+                yield from _format_lines(result, clean)
+        while pending:
+            result = pending.popleft().result()
+            entropies.extend(line.password for line in result.lines)
+            illegal += len(result.illegal)
+            yield from _format_lines(result, clean)
+    if totals is not None:
+        totals.illegal += illegal
+    yield _format_summary(name, entropies, illegal)
+
+
+def _audit_stream_path(
+    path: Path, clean: bool, totals: AuditTotals
+) -> Iterator[str]:
+    """Yield the audit of standard input or the pipe at ``path``."""
+    if str(path) == STDIN:
+        yield from audit_stream(
+            sys.stdin.buffer, "<stdin>", clean=clean, totals=totals
+        )
+        return
+    try:
+        stream = open(path, "rb", buffering=0)
+    except OSError as exc:
+        totals.errors += 1
+        yield f"{path}: error: {exc}"
+        return
+    with stream:
+        yield from audit_stream(stream, str(path), clean=clean, totals=totals)
+
+
+def audit_files(
+    paths: list[Path],
+    *,
+    clean: bool = False,
+    totals: AuditTotals | None = None,
+) -> Iterator[str]:
+    """Yield the formatted audit of ``paths`` in the given order.
+
+    Files are read concurrently by a thread pool while the analysis runs in a
+    process pool, so reading and computing overlap. Standard input and pipes
+    are streamed with :func:`audit_stream`. Unreadable files and illegal lines
+    are reported in the output and counted in ``totals`` when given.
+    """
+    if totals is None:
+        totals = AuditTotals()
+    for streamed, group in itertools.groupby(paths, key=_is_stream):
+        if streamed:
+            for path in group:
+                yield from _audit_stream_path(path, clean, totals)
+        else:
+            yield from _audit_regular_files(list(group), clean, totals)
+
+
+def _audit_regular_files(
+    paths: list[Path], clean: bool, totals: AuditTotals
+) -> Iterator[str]:
+    """Yield the audit of regular files using the reader and worker pools."""
+    window = 2 * (os.cpu_count() or 1)
+    remaining = iter(paths)
+    with ThreadPoolExecutor() as readers, ProcessPoolExecutor() as workers:
+        _start_workers(workers)
+        # Both the reads and the analyses in flight are limited to ``window``
+        # files, which keeps memory bounded on large trees.
+        reads: deque[tuple[Path, Future[tuple[list[str], str | None]]]] = deque(
+            (path, readers.submit(_read_file, path))
+            for path in itertools.islice(remaining, window)
+        )
+        pending: deque[Future[FileResult] | FileResult] = deque()
+        while reads:
+            path, read = reads.popleft()
+            lines, error = read.result()
+            for next_path in itertools.islice(remaining, 1):
+                reads.append((next_path, readers.submit(_read_file, next_path)))
+            if error is not None:
+                pending.append(FileResult(str(path), [], [], error))
+            else:
+                pending.append(workers.submit(analyze_lines, str(path), lines))
+            while pending and (
+                len(pending) > window
+                or not isinstance(pending[0], Future)
+                or pending[0].done()
+            ):
+                yield from _format_pending(pending.popleft(), clean, totals)
+        while pending:
+            yield from _format_pending(pending.popleft(), clean, totals)
+
+
+def _format_pending(
+    item: Future[FileResult] | FileResult, clean: bool, totals: AuditTotals
+) -> list[str]:
+    """Return the formatted output of a finished or pending file result."""
+    result = item.result() if isinstance(item, Future) else item
+    totals.add(result)
+    return format_file_result(result, clean=clean)
@@ -5,8 +5,10 @@ from __future__ import annotations
 import argparse
 import logging
 import sys
+from pathlib import Path
 
 from . import __version__
+from .audit import STDIN, AuditTotals, audit_files, expand_paths, read_lines
 from .utils import (
     build_charset,
     generate_string,
@@ -17,6 +19,7 @@ from .utils import (
     positive_int,
     shannon_entropy,
 )
+from .wordlist import DEFAULT_WORDLIST, WordList
 
 logger = logging.getLogger(__name__)
 
@@ -99,13 +102,39 @@ def parse_args(
             "(default: charsets/special_charset_default.txt)"
         ),
     )
+    parser.add_argument(
+        "-w",
+        "--words",
+        nargs="?",
+        const="",
+        metavar="FILE",
+        help=(
+            "generate a passphrase of LENGTH words from the word list FILE "
+            "(default: wordlists/wordlist_default.txt)"
+        ),
+    )
+    parser.add_argument(
+        "--separator",
+        metavar="SEP",
+        help="separator between passphrase words (default: space)",
+    )
+    parser.add_argument(
+        "-n",
+        "--count",
+        type=positive_int,
+        metavar="N",
+        help="number of passphrases to generate with -w (default: 1)",
+    )
     parser.add_argument(
         "-r",
         "--entropy",
         nargs="?",
         const="",
         metavar="STRING",
-        help="calculate entropies for STRING or each line in FILE",
+        help=(
+            "calculate entropies for STRING or each line in FILE "
+            "(- reads lines from standard input)"
+        ),
     )
     parser.add_argument(
         "-c",
@@ -116,10 +145,14 @@ def parse_args(
     parser.add_argument(
         "-f",
         "--file",
-        nargs="?",
-        const=".",
+        nargs="*",
         metavar="FILE",
-        help="read input from or write output to FILE (default: .)",
+        help=(
+            "read input from or write output to FILE (default for output: .); "
+            "with -r, a single FILE aborts on the first illegal line, while "
+            "several files, globs or directories are audited completely and "
+            "the exit status is 2 if any file or line failed"
+        ),
     )
     parser.add_argument(
         "-V",
@@ -132,8 +165,7 @@ def parse_args(
         "length",
         type=positive_int,
         nargs="?",
-        default=12,
-        help="length of the generated string",
+        help="length of the generated string (default: 12)",
     )
     if arguments is None:
         arguments = sys.argv[1:]
@@ -157,7 +189,85 @@ def parse_args(
             processed.extend(["-s", ""])
         else:
             processed.append(arg)
-    return parser.parse_args(processed), parser
+    args = parser.parse_args(processed)
+    if (
+        args.words
+        and args.words.isdigit()
+        and args.length is None
+        and not Path(args.words).is_file()
+    ):
+        # "-w NUMBER" uses the default word list for NUMBER words.
+        try:
+            args.length = positive_int(args.words)
+        except argparse.ArgumentTypeError as exc:
+            parser.error(str(exc))
+        args.words = ""
+    if args.words is None:
+        if args.count is not None:
+            parser.error("-n/--count requires -w/--words")
+        if args.separator is not None:
+            parser.error("--separator requires -w/--words")
+    elif (
+        args.lower
+        or args.upper
+        or args.digits
+        or args.hex
+        or args.bin
+        or args.oct
+        or args.spec is not None
+    ):
+        parser.error("character set options cannot be combined with -w/--words")
+    if args.count is None:
+        args.count = 1
+    if args.separator is None:
+        args.separator = " "
+    files = args.file
+    if files is not None:
+        if not files:
+            if args.entropy is not None:
+                parser.error("missing file")
+            files = ["."]
+        if (
+            args.entropy is None
+            and args.length is None
+            and len(files) == 2
+            and files[1].isdigit()
+        ):
+            # "-f FILE NUMBER" writes a string of NUMBER characters to FILE.
+            try:
+                args.length = positive_int(files.pop())
+            except argparse.ArgumentTypeError as exc:
+                parser.error(str(exc))
+        if args.entropy is None and len(files) > 1:
+            parser.error("only one output file may be given")
+        args.file = files[0]
+    args.files = files
+    if args.length is None:
+        args.length = 12
+    return args, parser
+
+
+def _run_audit(
+    parser: argparse.ArgumentParser, paths: list[Path], clean: bool
+) -> None:
+    """Log the audit of ``paths`` and exit with status 2 on any problem.
+
+    Unlike a single input file, which aborts at the first illegal line, the
+    audit reports every problem and only fails once all input was checked.
+    """
+    totals = AuditTotals()
+    try:
+        for message in audit_files(paths, clean=clean, totals=totals):
+            logger.info(message)
+    except OSError as exc:
+        parser.error(str(exc))
+    problems = []
+    if totals.errors:
+        problems.append(f"{totals.errors} unreadable file(s)")
+    if totals.illegal:
+        problems.append(f"{totals.illegal} line(s) with illegal characters")
+    if problems:
+        parser.exit(2, f"{parser.prog}: error: {', '.join(problems)}\n")
 
 
 def main() -> None:
@@ -167,10 +277,14 @@ def main() -> None:
     logger.handlers = [handler]
     logger.setLevel(logging.INFO)
     args, parser = parse_args()
+    if args.entropy == STDIN and args.file is None:
+        _run_audit(parser, [Path(STDIN)], args.clean)
+        return
+
     if args.entropy is not None and args.file is None:
         if args.entropy == "":
             parser.error("missing string")
-        if any(ord(ch) < 32 or ord(ch) > 126 for ch in args.entropy):
+        if not args.entropy.isprintable():
             parser.error("illegal characters")
         text_length = len(args.entropy)
         sh_entropy = shannon_entropy(args.entropy)
@@ -190,17 +304,28 @@ def main() -> None:
         return
 
     if args.file is not None and args.entropy is not None:
+        if (
+            len(args.files) > 1
+            or args.file == STDIN
+            or not Path(args.file).is_file()
+        ):
+            try:
+                paths = expand_paths(args.files)
+            except OSError as exc:
+                parser.error(str(exc))
+            if not paths:
+                parser.error("no files found")
+            _run_audit(parser, paths, args.clean)
+            return
         try:
-            with open(args.file, "r", encoding="utf-8") as fh:
-                lines = [line.rstrip("\n") for line in fh]
-                lines = [ln for ln in lines if ln]
-        except OSError as exc:
+            lines = [ln for ln in read_lines(args.file) if ln]
+        except (OSError, UnicodeDecodeError) as exc:
             parser.error(str(exc))
         logger.info(f"read from file {args.file}:")
         for idx, line in enumerate(lines, start=1):
             if line == "":
                 continue
-            if any(ord(ch) < 32 or ord(ch) > 126 for ch in line):
+            if not line.isprintable():
                 parser.error("illegal characters")
             text_length = len(line)
             sh_entropy = shannon_entropy(line)
@@ -220,12 +345,45 @@ def main() -> None:
             )
         return
 
+    if args.words is not None:
+        path = Path(args.words) if args.words else DEFAULT_WORDLIST
+        try:
+            # The bundled list is small enough to index on every run.
+            wordlist = WordList(path, cache=bool(args.words))
+        except (OSError, ValueError) as exc:
+            parser.error(str(exc))
+        with wordlist:
+            phrases = wordlist.passphrases(
+                args.count, args.length, args.separator
+            )
+            size = len(wordlist)
+            entropy = wordlist.entropy(args.length)
+        if args.file is not None:
+            try:
+                with open(args.file, "w", encoding="utf-8") as fh:
+                    fh.write("\n".join(phrases))
+            except OSError as exc:
+                parser.error(str(exc))
+            if args.clean:
+                return
+        elif args.clean:
+            for phrase in phrases:
+                logger.info(phrase)
+            return
+        else:
+            for phrase in phrases:
+                logger.info(phrase)
+        logger.info(f"Words: {args.length}")
+        logger.info(f"Password entropy: {entropy:.2f} bits")
+        logger.info(f"Word list: {path} ({size} words)")
+        return
+
     try:
         groups = build_charset(args, as_groups=True)
     except argparse.ArgumentTypeError as exc:
         parser.error(str(exc))
-    charset = "".join(groups)
-    if not charset:
+    groups = [group for group in groups if group]
+    if not groups:
         parser.error(
             "No character set selected. Use -a, -A, -i/-10, -b, -o or -x"
         )
@@ -233,7 +391,7 @@ def main() -> None:
     if len(groups) > 1:
         result = generate_string_mixed(args.length, groups)
     else:
-        result = generate_string(args.length, charset)
+        result = generate_string(args.length, groups[0])
     if args.file is not None:
         try:
             with open(args.file, "w", encoding="utf-8") as fh:
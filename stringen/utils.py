@@ -6,8 +6,23 @@ import argparse
 import math
 import secrets
 import string
+from array import array
 from collections import Counter
 from pathlib import Path
+from typing import Iterable
+
+# Character classes used by the entropy estimates. Anything that is neither
+# lowercase, uppercase nor a digit counts as an individual symbol.
+_LOWER = 1
+_UPPER = 2
+_DIGIT = 4
+_ASCII_CLASSES = bytes(
+    (_LOWER if ch.islower() else 0)
+    | (_UPPER if ch.isupper() else 0)
+    | (_DIGIT if ch.isdigit() else 0)
+    for ch in map(chr, range(128))
+)
+_unicode_classes: dict[str, int] = {}
 
 
 def positive_int(value: str) -> int:
@@ -21,8 +36,14 @@ def positive_int(value: str) -> int:
     return ivalue
 
 
-def build_charset(args: argparse.Namespace, *, as_groups: bool = False) -> str | list[str]:
-    """Return a character set string or list of character groups."""
+def build_charset(
+    args: argparse.Namespace, *, as_groups: bool = False
+) -> str | list[array]:
+    """Return a character set string or list of code point tables.
+
+    Each group is deduplicated once here, so the tables can be handed to
+    :func:`generate_string` and :func:`generate_string_mixed` as they are.
+    """
     if args.hex:
         charset = (
             string.digits + "abcdef"
@@ -31,11 +52,11 @@ def build_charset(args: argparse.Namespace, *, as_groups: bool = False) -> str |
             if args.upper and not args.lower
             else string.digits + "abcdefABCDEF"
         )
-        return [charset] if as_groups else charset
+        return [code_point_table(charset)] if as_groups else charset
     if args.bin:
-        return ["01"] if as_groups else "01"
+        return [code_point_table("01")] if as_groups else "01"
     if args.oct:
-        return ["01234567"] if as_groups else "01234567"
+        return [code_point_table("01234567")] if as_groups else "01234567"
 
     if not (args.lower or args.upper or args.digits or args.spec is not None):
         use_lower = use_upper = use_digits = True
@@ -44,13 +65,13 @@ def build_charset(args: argparse.Namespace, *, as_groups: bool = False) -> str |
         use_upper = args.upper
         use_digits = args.digits
 
-    groups: list[str] = []
+    groups: list[array] = []
     if use_lower:
-        groups.append(string.ascii_lowercase)
+        groups.append(code_point_table(string.ascii_lowercase))
     if use_upper:
-        groups.append(string.ascii_uppercase)
+        groups.append(code_point_table(string.ascii_uppercase))
     if use_digits:
-        groups.append(string.digits)
+        groups.append(code_point_table(string.digits))
     if args.spec is not None:
         if args.spec == "":
             path = Path(__file__).resolve().parent / "charsets" / "special_charset_default.txt"
@@ -59,39 +80,97 @@ def build_charset(args: argparse.Namespace, *, as_groups: bool = False) -> str |
             path = p if p.is_file() else None
         try:
             if path is None:
-                spec_chars = args.spec
+                table = code_point_table(args.spec)
             else:
-                spec_chars = path.read_text(encoding="utf-8").strip()
+                table = load_charset_file(path)
         except OSError as exc:
             raise argparse.ArgumentTypeError(str(exc))
-        groups.append(spec_chars)
+        # Characters already covered by another group would otherwise be
+        # drawn more often than the rest.
+        taken = {code for group in groups for code in group}
+        groups.append(array("I", (code for code in table if code not in taken)))
+
+    if as_groups:
+        return groups
+    return "".join(chr(code) for table in groups for code in table)
+
+
+def code_point_table(chars: Iterable[str]) -> array:
+    """Return the unique code points of ``chars`` as an ``array('I')``.
+
+    Duplicates are dropped while the order of first occurrence is kept.
+    """
+    return array("I", dict.fromkeys(map(ord, chars)))
 
-    charset = "".join(groups)
-    return groups if as_groups else charset
+
+def load_charset_file(path: Path) -> array:
+    """Return the code point table stored in the charset file ``path``.
+
+    Line breaks and surrounding whitespace of each line are ignored, so large
+    alphabets may be spread over multiple lines.
+    """
+    text = path.read_text(encoding="utf-8")
+    return code_point_table("".join(line.strip() for line in text.splitlines()))
+
+
+def sample_indices(count: int, size: int) -> list[int]:
+    """Return ``count`` uniform random indices in ``range(size)``.
+
+    Randomness is drawn in bulk from ``secrets.token_bytes`` and unbiased by
+    masking and rejection sampling.
+    """
+    if size <= 0:
+        raise ValueError("cannot sample from an empty character set")
+    bits = (size - 1).bit_length()
+    mask = (1 << bits) - 1
+    fmt = "B" if bits <= 8 else "H" if bits <= 16 else "I"
+    itemsize = array(fmt).itemsize
+    result: list[int] = []
+    while len(result) < count:
+        # At least half of all masked values are accepted, so drawing twice
+        # the missing amount usually finishes in a single round.
+        needed = count - len(result)
+        raw = array(fmt, secrets.token_bytes(2 * needed * itemsize))
+        result.extend(v for v in (r & mask for r in raw) if v < size)
+    del result[count:]
+    return result
 
 
-def generate_string(length: int, charset: str) -> str:
+def _as_table(charset: str | array) -> array:
+    """Return ``charset`` as a code point table without deduplication."""
+    if isinstance(charset, array):
+        return charset
+    return array("I", map(ord, charset))
+
+
+def generate_string(length: int, charset: str | array) -> str:
     """Generate string of given length from charset using secrets."""
-    return "".join(secrets.choice(charset) for _ in range(length))
+    table = _as_table(charset)
+    return "".join(
+        map(chr, (table[i] for i in sample_indices(length, len(table))))
+    )
 
 
-def generate_string_mixed(length: int, groups: list[str]) -> str:
+def generate_string_mixed(length: int, groups: list[str] | list[array]) -> str:
     """Generate a string from multiple groups.
 
     When ``length`` is at least the number of groups, ensure the result contains
     one character from each group. Otherwise, select random characters from the
+    combined set. Characters shared by several groups appear only once in the
     combined set.
     """
     if not groups:
         return ""
-    all_chars = "".join(groups)
-    if length < len(groups):
-        return generate_string(length, all_chars)
-    result = [secrets.choice(group) for group in groups]
-    for _ in range(length - len(groups)):
-        result.append(secrets.choice(all_chars))
+    tables = [_as_table(group) for group in groups]
+    combined = array("I", dict.fromkeys(code for t in tables for code in t))
+    if length < len(tables):
+        return generate_string(length, combined)
+    result = [table[sample_indices(1, len(table))[0]] for table in tables]
+    result.extend(
+        combined[i] for i in sample_indices(length - len(tables), len(combined))
+    )
     secrets.SystemRandom().shuffle(result)
-    return "".join(result)
+    return "".join(map(chr, result))
 
 
 def shannon_entropy(text: str) -> float:
@@ -128,24 +207,50 @@ def recognized_base(text: str) -> int:
     return 0
 
 
+def _char_class(ch: str) -> int:
+    """Return the class bits of ``ch`` using the precomputed tables."""
+    code = ord(ch)
+    if code < 128:
+        return _ASCII_CLASSES[code]
+    cls = _unicode_classes.get(ch)
+    if cls is None:
+        cls = (
+            (_LOWER if ch.islower() else 0)
+            | (_UPPER if ch.isupper() else 0)
+            | (_DIGIT if ch.isdigit() else 0)
+        )
+        _unicode_classes[ch] = cls
+    return cls
+
+
 def character_set_size(text: str) -> int:
-    """Return the size of the character set present in ``text``."""
+    """Return the size of the character set present in ``text``.
+
+    Lowercase letters, uppercase letters and digits count as their full ASCII
+    ranges; every other distinct character counts as one symbol.
+    """
     if not text:
         return 0
     base = recognized_base(text)
     if base:
         return base
 
-    size = 0
-    if any(c.islower() for c in text):
+    classes = 0
+    symbols = 0
+    for ch in set(text):
+        cls = _char_class(ch)
+        if cls:
+            classes |= cls
+        else:
+            symbols += 1
+
+    size = symbols
+    if classes & _LOWER:
         size += 26
-    if any(c.isupper() for c in text):
+    if classes & _UPPER:
         size += 26
-    if any(c.isdigit() for c in text):
+    if classes & _DIGIT:
         size += 10
-    specials = {c for c in text if not c.isalnum()}
-    size += len(specials)
-
     return size
 
 
@@ -153,18 +258,7 @@ def password_entropy(text: str) -> float:
     """Return password entropy based on character set size and length."""
     if not text:
         return 0.0
-    charset = recognized_base(text)
-    if charset == 0:
-        if any(c.islower() for c in text):
-            charset += 26
-        if any(c.isupper() for c in text):
-            charset += 26
-        if any(c.isdigit() for c in text):
-            charset += 10
-        # Account for special characters by counting the unique symbols
-        specials = {c for c in text if not c.isalnum()}
-        charset += len(specials)
+    charset = character_set_size(text)
     if charset == 0:
         return 0.0
     return len(text) * math.log2(charset)
-
@@ -0,0 +1,209 @@
+"""Passphrase generation from memory-mapped word lists."""
+
+from __future__ import annotations
+
+import hashlib
+import math
+import mmap
+import os
+import struct
+from array import array
+from pathlib import Path
+
+from .utils import sample_indices
+
+DEFAULT_WORDLIST = (
+    Path(__file__).resolve().parent / "wordlists" / "wordlist_default.txt"
+)
+
+# Index header: magic, size, modification and change time and inode of the
+# word file and the number of words. It is followed by a (start, end) byte
+# offset pair per word.
+_INDEX_MAGIC = b"STRWIDX2"
+_INDEX_HEADER = struct.Struct("=8sQqqQQ")
+
+
+def cache_dir() -> Path:
+    """Return the user cache directory holding word list indexes.
+
+    This is ``$XDG_CACHE_HOME/stringen`` (default ``~/.cache/stringen``), or
+    ``%LOCALAPPDATA%\\stringen`` on Windows.
+    """
+    if os.name == "nt":
+        base = os.environ.get("LOCALAPPDATA") or Path.home() / "AppData" / "Local"
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "stringen"
+
+
+def index_path(path: Path) -> Path:
+    """Return the cached offset index belonging to word file ``path``."""
+    digest = hashlib.sha256(os.fsencode(path.resolve())).hexdigest()[:16]
+    return cache_dir() / f"{path.name}.{digest}.idx"
+
+
+def build_index(path: Path) -> array:
+    """Return the ``(start, end)`` byte offsets of every word in ``path``.
+
+    Empty lines and repeated words are skipped, so every word counts once
+    towards the entropy. When a line has several fields, as in diceware lists
+    (``11111 abacus``), the last field is used as the word. Raises
+    ``ValueError`` when a word is not valid UTF-8.
+    """
+    offsets = array("Q")
+    seen: set[bytes] = set()
+    position = 0
+    with open(path, "rb") as fh:
+        for number, line in enumerate(fh, start=1):
+            fields = line.split()
+            if fields and fields[-1] not in seen:
+                word = fields[-1]
+                try:
+                    word.decode("utf-8")
+                except UnicodeDecodeError as exc:
+                    raise ValueError(
+                        f"invalid UTF-8 in word list '{path}' line {number}: {exc}"
+                    ) from None
+                seen.add(word)
+                start = position + line.rindex(word)
+                offsets.extend((start, start + len(word)))
+            position += len(line)
+    return offsets
+
+
+def _write_index(path: Path, stat: os.stat_result, offsets: array) -> None:
+    """Store ``offsets`` in the cache, replacing any outdated index."""
+    target = index_path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_name(target.name + f".{os.getpid()}.tmp")
+    header = _INDEX_HEADER.pack(
+        _INDEX_MAGIC,
+        stat.st_size,
+        stat.st_mtime_ns,
+        stat.st_ctime_ns,
+        stat.st_ino,
+        len(offsets) // 2,
+    )
+    try:
+        with open(tmp, "wb") as fh:
+            fh.write(header)
+            offsets.tofile(fh)
+        os.replace(tmp, target)
+    except OSError:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+class WordList:
+    """Word list backed by a memory-mapped word file and offset index.
+
+    The index is built once and cached in :func:`cache_dir`, so opening a
+    list costs the same regardless of its size. With ``cache=False`` the
+    index is only kept in memory, which suits small lists. Use as a context
+    manager or call :meth:`close` to release the mappings.
+    """
+
+    def __init__(self, path: str | Path, *, cache: bool = True) -> None:
+        self.path = Path(path)
+        self.cache = cache
+        self._index_map: mmap.mmap | None = None
+        with open(self.path, "rb") as fh:
+            stat = os.fstat(fh.fileno())
+            if stat.st_size == 0:
+                raise ValueError(f"word list is empty: '{self.path}'")
+            self._words = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self._offsets = self._load_index(stat)
+        except BaseException:
+            self.close()
+            raise
+        if not len(self):
+            self.close()
+            raise ValueError(f"word list is empty: '{self.path}'")
+
+    def _load_index(self, stat: os.stat_result) -> memoryview | array:
+        """Return the offset index, reusing the cached one when current."""
+        if not self.cache:
+            return build_index(self.path)
+        try:
+            with open(index_path(self.path), "rb") as fh:
+                index_map = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            index_map = None
+        if index_map is not None:
+            if len(index_map) >= _INDEX_HEADER.size:
+                magic, size, mtime, ctime, inode, count = (
+                    _INDEX_HEADER.unpack_from(index_map)
+                )
+                body = len(index_map) - _INDEX_HEADER.size
+                if (
+                    magic == _INDEX_MAGIC
+                    and size == stat.st_size
+                    and mtime == stat.st_mtime_ns
+                    and ctime == stat.st_ctime_ns
+                    and inode == stat.st_ino
+                    and body == count * 2 * array("Q").itemsize
+                ):
+                    offsets = memoryview(index_map)[_INDEX_HEADER.size:].cast("Q")
+                    # Offsets past the end of the word file mean the index
+                    # belongs to other contents; rebuild it.
+                    if not offsets or offsets[-1] <= len(self._words):
+                        self._index_map = index_map
+                        return offsets
+                    offsets.release()
+            index_map.close()
+        offsets = build_index(self.path)
+        try:
+            _write_index(self.path, stat, offsets)
+        except (OSError, struct.error):
+            # An unwritable cache or a word file with timestamps that cannot
+            # be stored still works, just without the saved index.
+            pass
+        return offsets
+
+    def __len__(self) -> int:
+        return len(self._offsets) // 2
+
+    def __getitem__(self, index: int) -> str:
+        if not 0 <= index < len(self):
+            raise IndexError("word index out of range")
+        start = self._offsets[2 * index]
+        end = self._offsets[2 * index + 1]
+        return self._words[start:end].decode("utf-8")
+
+    def __enter__(self) -> WordList:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Release the memory mappings."""
+        offsets = getattr(self, "_offsets", None)
+        if isinstance(offsets, memoryview):
+            offsets.release()
+        if self._index_map is not None:
+            self._index_map.close()
+            self._index_map = None
+        self._words.close()
+
+    def entropy(self, words: int) -> float:
+        """Return the entropy in bits of a passphrase with ``words`` words."""
+        return words * math.log2(len(self))
+
+    def passphrase(self, words: int, separator: str = " ") -> str:
+        """Return a passphrase of ``words`` uniformly chosen words."""
+        return self.passphrases(1, words, separator)[0]
+
+    def passphrases(
+        self, count: int, words: int, separator: str = " "
+    ) -> list[str]:
+        """Return ``count`` passphrases of ``words`` words each.
+
+        The random indices for all passphrases are drawn in a single batch.
+        """
+        indices = sample_indices(count * words, len(self))
+        return [
+            separator.join(self[i] for i in indices[n * words:(n + 1) * words])
+            for n in range(count)
+        ]
@@ -1,13 +1,26 @@
 """Tests for the stringen command line interface and utilities."""
 
+import io
+import os
 import string
 import sys
 from pathlib import Path
 import math
 import pytest
 
+from stringen.audit import iter_stream_lines, read_chunks
 from stringen.cli import parse_args, main
-from stringen.utils import build_charset, password_entropy, recognized_base
+from stringen.utils import (
+    build_charset,
+    character_set_size,
+    code_point_table,
+    generate_string,
+    generate_string_mixed,
+    password_entropy,
+    recognized_base,
+    sample_indices,
+)
+from stringen.wordlist import WordList, index_path
 
 
 def test_length_validation():
@@ -266,3 +279,415 @@ def test_main_length_shorter_than_groups(monkeypatch, capsys):
     out = capsys.readouterr().out.strip()
     assert len(out.splitlines()[0]) == 2
 
+
+
+def test_spec_unicode_file_dedup(tmp_path):
+    """Unicode charset files are deduplicated and may span multiple lines."""
+    p = tmp_path / 'cjk.txt'
+    p.write_text('中文字\n字符中\n', encoding='utf-8')
+    args, _ = parse_args(['-s', str(p)])
+    charset = build_charset(args)
+    assert charset == '中文字符'
+
+
+def test_build_charset_groups_are_tables():
+    """Character groups are returned as deduplicated code point tables."""
+    args, _ = parse_args(['-a', '-s', '!@!'])
+    groups = build_charset(args, as_groups=True)
+    assert all(group.typecode == 'I' for group in groups)
+    assert groups[-1].tolist() == [ord('!'), ord('@')]
+
+
+def test_build_charset_spec_overlap_dropped():
+    """Special characters already in another group are not added twice."""
+    args, _ = parse_args(['-a', '-s', 'abc!'])
+    groups = build_charset(args, as_groups=True)
+    assert groups[-1].tolist() == [ord('!')]
+    assert build_charset(args) == string.ascii_lowercase + '!'
+
+
+def test_generate_string_mixed_dedups_combined(monkeypatch):
+    """Characters shared by groups are drawn from the combined set once."""
+    sizes = []
+
+    def fake_sample(count, size):
+        sizes.append(size)
+        return [0] * count
+
+    monkeypatch.setattr('stringen.utils.sample_indices', fake_sample)
+    generate_string_mixed(4, ['abc', 'c!'])
+    assert sizes[-1] == 4
+
+
+def test_code_point_table_dedup():
+    """code_point_table keeps the first occurrence of each character."""
+    table = code_point_table('abcab')
+    assert table.typecode == 'I'
+    assert list(table) == [ord('a'), ord('b'), ord('c')]
+
+
+def test_sample_indices_range():
+    """sample_indices returns the requested count of in-range indices."""
+    indices = sample_indices(500, 3000)
+    assert len(indices) == 500
+    assert all(0 <= i < 3000 for i in indices)
+
+
+def test_generate_string_from_table():
+    """generate_string accepts a code point table."""
+    table = code_point_table(chr(c) for c in range(0x4E00, 0x4E00 + 2000))
+    result = generate_string(16, table)
+    assert len(result) == 16
+    assert all(0x4E00 <= ord(ch) < 0x4E00 + 2000 for ch in result)
+
+
+def test_character_set_size_unicode():
+    """Caseless Unicode symbols each count towards the character set."""
+    assert character_set_size('中文字') == 3
+    assert character_set_size('中a!') == 28
+
+
+def test_main_entropy_unicode(monkeypatch, capsys):
+    """Printable Unicode strings are accepted by -r."""
+    monkeypatch.setattr(sys, 'argv', ['stringen', '-c', '-r', '中文字'])
+    main()
+    captured = capsys.readouterr()
+    assert captured.out.strip() == f"{password_entropy('中文字'):.2f}"
+
+
+def test_file_argument_multiple():
+    """With -r, the -f option accepts several paths."""
+    args, _ = parse_args(['-r', '-f', 'a.txt', 'b.txt'])
+    assert args.files == ['a.txt', 'b.txt']
+    assert args.file == 'a.txt'
+
+
+def test_file_argument_required_with_entropy():
+    """-r -f without a path does not fall back to the current directory."""
+    with pytest.raises(SystemExit):
+        parse_args(['-r', '-f'])
+
+
+def test_file_argument_length_after_file():
+    """A number after the output file is used as the length."""
+    args, _ = parse_args(['-f', 'out.txt', '7'])
+    assert args.file == 'out.txt'
+    assert args.length == 7
+
+
+def test_main_entropy_from_directory(monkeypatch, tmp_path, capsys):
+    """Directories are audited recursively with tagged output and summaries."""
+    (tmp_path / 'sub').mkdir()
+    (tmp_path / 'a.txt').write_text('abc\n\n1010\n')
+    (tmp_path / 'sub' / 'b.txt').write_text('x\x01y\n')
+    monkeypatch.setattr(sys, 'argv', ['stringen', '-c', '-r', '-f', str(tmp_path)])
+    with pytest.raises(SystemExit) as exc:
+        main()
+    assert exc.value.code == 2
+    lines = capsys.readouterr().out.strip().splitlines()
+    a_path = tmp_path / 'a.txt'
+    b_path = tmp_path / 'sub' / 'b.txt'
+    assert any(
+        l.startswith(f'{a_path}:3: Length: 4') and l.endswith('(Character Set: 2)')
+        for l in lines
+    )
+    assert f'{b_path}:1: illegal characters' in lines
+    assert any(l.startswith(f'{a_path}: Lines: 2') for l in lines)
+    assert 'string:' not in '\n'.join(lines)
+
+
+def test_main_entropy_from_glob(monkeypatch, tmp_path, capsys):
+    """Glob patterns select the files to audit."""
+    (tmp_path / 'a.txt').write_text('abc\n')
+    (tmp_path / 'b.log').write_text('1010\n')
+    monkeypatch.setattr(
+        sys, 'argv', ['stringen', '-r', '-f', str(tmp_path / '*.txt')]
+    )
+    main()
+    out = capsys.readouterr().out
+    assert f'{tmp_path / "a.txt"}:1: string: abc' in out
+    assert 'b.log' not in out
+
+
+def test_main_entropy_unreadable_file_fails(monkeypatch, tmp_path, capsys):
+    """Unreadable files are reported and make the audit exit non-zero."""
+    bad = tmp_path / 'bad.dat'
+    bad.write_bytes(b'\xff\xfe\n')
+    good = tmp_path / 'a.txt'
+    good.write_text('abc\n')
+    monkeypatch.setattr(sys, 'argv', ['stringen', '-r', '-f', str(bad), str(good)])
+    with pytest.raises(SystemExit) as exc:
+        main()
+    assert exc.value.code == 2
+    captured = capsys.readouterr()
+    assert f'{bad}: error:' in captured.out
+    assert f'{good}: Lines: 1' in captured.out
+    assert '1 unreadable file(s)' in captured.err
+
+
+def test_main_entropy_clean_audit_succeeds(monkeypatch, tmp_path, capsys):
+    """An audit without problems exits normally."""
+    for name in ('a.txt', 'b.txt'):
+        (tmp_path / name).write_text('abc\n')
+    monkeypatch.setattr(sys, 'argv', ['stringen', '-c', '-r', '-f', str(tmp_path)])
+    main()
+    assert capsys.readouterr().err == ''
+
+
+def test_main_entropy_empty_directory(monkeypatch, tmp_path):
+    """A directory without files aborts instead of silently succeeding."""
+    (tmp_path / 'empty').mkdir()
+    monkeypatch.setattr(
+        sys, 'argv', ['stringen', '-r', '-f', str(tmp_path / 'empty')]
+    )
+    with pytest.raises(SystemExit) as exc:
+        main()
+    assert exc.value.code == 2
+
+
+def test_main_entropy_missing_path(monkeypatch, tmp_path):
+    """Missing audit paths abort the program."""
+    monkeypatch.setattr(
+        sys, 'argv', ['stringen', '-r', '-f', str(tmp_path / 'missing*')]
+    )
+    with pytest.raises(SystemExit):
+        main()
+
+
+@pytest.fixture
+def cache_home(monkeypatch, tmp_path):
+    """Redirect the word list index cache into a temporary directory."""
+    cache = tmp_path / 'cache'
+    monkeypatch.setenv('XDG_CACHE_HOME', str(cache))
+    monkeypatch.setenv('LOCALAPPDATA', str(cache))
+    return cache
+
+
+def test_wordlist_index_and_lookup(tmp_path, cache_home):
+    """Word lists are indexed once and support diceware formatted lines."""
+    p = tmp_path / 'words.txt'
+    p.write_text('11111\tabacus\n\n11112 abdomen \n11113 café', encoding='utf-8')
+    with WordList(p) as wordlist:
+        assert len(wordlist) == 3
+        assert [wordlist[i] for i in range(3)] == ['abacus', 'abdomen', 'café']
+    assert index_path(p).is_file()
+    assert cache_home in index_path(p).parents
+    assert not (tmp_path / 'words.txt.idx').exists()
+    with WordList(p) as wordlist:
+        assert wordlist[2] == 'café'
+
+
+def test_wordlist_index_rebuilt_for_same_size_and_mtime(tmp_path, cache_home):
+    """Replacing the file with same size and mtime does not reuse the index."""
+    p = tmp_path / 'words.txt'
+    p.write_text('ab\ncd\u00e9\n', encoding='utf-8')
+    with WordList(p) as wordlist:
+        assert wordlist[1] == 'cd\u00e9'
+    mtime = p.stat().st_mtime_ns
+    p.write_text('ab\u00e9\ncd\n', encoding='utf-8')
+    os.utime(p, ns=(mtime, mtime))
+    with WordList(p) as wordlist:
+        assert [wordlist[0], wordlist[1]] == ['ab\u00e9', 'cd']
+
+
+def test_wordlist_pre_epoch_mtime(tmp_path, cache_home):
+    """Word files with an mtime before 1970 can be indexed and cached."""
+    p = tmp_path / 'words.txt'
+    p.write_text('one\ntwo\n')
+    os.utime(p, ns=(-10**9, -10**9))
+    with WordList(p) as wordlist:
+        assert len(wordlist) == 2
+    with WordList(p) as wordlist:
+        assert wordlist[1] == 'two'
+
+
+def test_wordlist_without_cache(tmp_path, cache_home):
+    """With cache=False the index is kept in memory only."""
+    p = tmp_path / 'words.txt'
+    p.write_text('one\ntwo\n')
+    with WordList(p, cache=False) as wordlist:
+        assert len(wordlist) == 2
+    assert not cache_home.exists()
+
+
+def test_wordlist_duplicates_skipped(tmp_path, cache_home):
+    """Repeated words count once towards the list size and entropy."""
+    p = tmp_path / 'words.txt'
+    p.write_text('cat\ncat\n11111 dog\ncat\n')
+    with WordList(p) as wordlist:
+        assert [wordlist[i] for i in range(len(wordlist))] == ['cat', 'dog']
+        assert wordlist.entropy(4) == pytest.approx(4.0)
+    p.write_text('cat\ncat\ncat\ncat\n')
+    with WordList(p) as wordlist:
+        assert wordlist.entropy(4) == 0.0
+
+
+def test_wordlist_invalid_utf8(tmp_path, cache_home):
+    """Word lists with invalid UTF-8 are rejected when indexed."""
+    p = tmp_path / 'words.txt'
+    p.write_bytes(b'ab\xffc\n')
+    with pytest.raises(ValueError):
+        WordList(p)
+
+
+def test_main_words_invalid_utf8(monkeypatch, tmp_path, cache_home):
+    """An undecodable word list aborts with a parser error."""
+    p = tmp_path / 'words.txt'
+    p.write_bytes(b'ab\xffc\n')
+    monkeypatch.setattr(sys, 'argv', ['stringen', '-w', str(p), '3'])
+    with pytest.raises(SystemExit):
+        main()
+
+
+def test_wordlist_index_rebuilt_when_changed(tmp_path, cache_home):
+    """An outdated index is rebuilt when the word file changes."""
+    p = tmp_path / 'words.txt'
+    p.write_text('one\ntwo\n')
+    with WordList(p) as wordlist:
+        assert len(wordlist) == 2
+    p.write_text('one\ntwo\nthree\n')
+    with WordList(p) as wordlist:
+        assert len(wordlist) == 3
+        assert wordlist[2] == 'three'
+
+
+def test_wordlist_passphrases(tmp_path, cache_home):
+    """Bulk generation returns passphrases of the requested word count."""
+    p = tmp_path / 'words.txt'
+    words = [f'word{i}' for i in range(100)]
+    p.write_text('\n'.join(words))
+    with WordList(p) as wordlist:
+        phrases = wordlist.passphrases(5, 4, '-')
+        assert wordlist.entropy(4) == pytest.approx(4 * math.log2(100))
+    assert len(phrases) == 5
+    for phrase in phrases:
+        parts = phrase.split('-')
+        assert len(parts) == 4
+        assert all(part in words for part in parts)
+
+
+def test_wordlist_empty(tmp_path, cache_home):
+    """Empty word lists are rejected."""
+    p = tmp_path / 'words.txt'
+    p.write_text('\n\n')
+    with pytest.raises(ValueError):
+        WordList(p)
+
+
+def test_words_argument_length():
+    """A number after -w is the word count for the default list."""
+    args, _ = parse_args(['-w', '5'])
+    assert args.words == ''
+    assert args.length == 5
+
+
+def test_count_requires_words():
+    """-n and --separator are rejected without -w."""
+    with pytest.raises(SystemExit):
+        parse_args(['-n', '3', '8'])
+    with pytest.raises(SystemExit):
+        parse_args(['--separator', '-', '8'])
+
+
+def test_words_rejects_charset_options():
+    """Character set options cannot be combined with -w."""
+    with pytest.raises(SystemExit):
+        parse_args(['-a', '-w', '2'])
+    with pytest.raises(SystemExit):
+        parse_args(['-w', '-s', '!'])
+
+
+def test_main_clean_passphrases(monkeypatch, tmp_path, capsys, cache_home):
+    """With -c, only the generated passphrases are printed."""
+    p = tmp_path / 'words.txt'
+    p.write_text('alpha\nbravo\ncharlie\n')
+    monkeypatch.setattr(
+        sys, 'argv', ['stringen', '-c', '-w', str(p), '-n', '3', '4']
+    )
+    main()
+    lines = capsys.readouterr().out.strip().splitlines()
+    assert len(lines) == 3
+    assert all(len(line.split(' ')) == 4 for line in lines)
+
+
+def test_main_default_wordlist_not_cached(monkeypatch, capsys, cache_home):
+    """The bundled word list is indexed in memory without writing a cache."""
+    monkeypatch.setattr(sys, 'argv', ['stringen', '-c', '-w', '3'])
+    main()
+    assert len(capsys.readouterr().out.split()) == 3
+    assert not cache_home.exists()
+    wordlists = Path(__file__).resolve().parent.parent / 'stringen' / 'wordlists'
+    assert not list(wordlists.glob('*.idx'))
+
+
+def test_iter_stream_lines_across_chunks():
+    """Lines split over chunk boundaries are joined back together."""
+    chunks = [b'ab', b'c\n10', b'10\n\nca', 'f\u00e9'.encode('utf-8')]
+    assert list(iter_stream_lines(chunks)) == ['abc', '1010', '', 'caf\u00e9']
+
+
+def test_iter_stream_lines_crlf_and_invalid_bytes():
+    """CRLF endings are stripped and undecodable lines stay non-printable."""
+    lines = list(iter_stream_lines([b'abc\r\n\xff\xfe\r', b'\nxyz\r\n']))
+    assert lines[0] == 'abc'
+    assert lines[2] == 'xyz'
+    assert not lines[1].isprintable()
+
+
+def test_read_chunks_small_size():
+    """read_chunks yields the whole stream in order."""
+    data = b'abc\n1010\n' * 50
+    assert b''.join(read_chunks(io.BytesIO(data), 7)) == data
+
+
+def test_main_entropy_from_stdin(monkeypatch, capsys):
+    """-r - reads the lines to analyse from standard input."""
+    stdin = io.TextIOWrapper(io.BytesIO(b'abc\n\n1010\nx\x01y\n'))
+    monkeypatch.setattr(sys, 'stdin', stdin)
+    monkeypatch.setattr(sys, 'argv', ['stringen', '-c', '-r', '-'])
+    with pytest.raises(SystemExit) as exc:
+        main()
+    assert exc.value.code == 2
+    lines = capsys.readouterr().out.strip().splitlines()
+    assert lines[0].startswith('<stdin>:1: Length: 3')
+    assert lines[1].startswith('<stdin>:3: Length: 4')
+    assert '<stdin>:4: illegal characters' in lines
+    assert lines[-1].startswith('<stdin>: Lines: 2')
+
+
+def test_main_entropy_stdin_crlf(monkeypatch, capsys):
+    """CRLF input from stdin is analysed like the same file."""
+    stdin = io.TextIOWrapper(io.BytesIO(b'abc\r\n1010\r\n'))
+    monkeypatch.setattr(sys, 'stdin', stdin)
+    monkeypatch.setattr(sys, 'argv', ['stringen', '-c', '-r', '-'])
+    main()
+    lines = capsys.readouterr().out.strip().splitlines()
+    assert lines[0].startswith('<stdin>:1: Length: 3')
+    assert lines[1].startswith('<stdin>:2: Length: 4')
+    assert 'illegal' not in lines[-1]
+
+
+def test_main_entropy_stdin_invalid_bytes(monkeypatch, capsys):
+    """Undecodable stdin lines are reported as illegal; the stream goes on."""
+    stdin = io.TextIOWrapper(io.BytesIO(b'abc\n\xff\xfe\nxyz\n'))
+    monkeypatch.setattr(sys, 'stdin', stdin)
+    monkeypatch.setattr(sys, 'argv', ['stringen', '-c', '-r', '-'])
+    with pytest.raises(SystemExit) as exc:
+        main()
+    assert exc.value.code == 2
+    lines = capsys.readouterr().out.strip().splitlines()
+    assert '<stdin>:2: illegal characters' in lines
+    assert any(l.startswith('<stdin>:3: Length: 3') for l in lines)
+    assert lines[-1].startswith('<stdin>: Lines: 2')
+
+
+def test_main_entropy_stdin_in_file_list(monkeypatch, tmp_path, capsys):
+    """- may be mixed with files in the -f list."""
+    p = tmp_path / 'a.txt'
+    p.write_text('abc\n')
+    stdin = io.TextIOWrapper(io.BytesIO(b'1010\n'))
+    monkeypatch.setattr(sys, 'stdin', stdin)
+    monkeypatch.setattr(sys, 'argv', ['stringen', '-r', '-f', '-', str(p)])
+    main()
+    out = capsys.readouterr().out
+    assert out.index('<stdin>:1: string: 1010') < out.index(f'{p}:1: string: abc')